@@ -8,12 +8,16 @@ with WebSocket support for real-time frame processing.
 import os
 import sys
 import math
-import base64
 import json
 import asyncio
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 import uuid
+import time
+import threading
+from array import array
+from itertools import repeat
+from concurrent.futures import ThreadPoolExecutor
 
 import cv2
 import numpy as np
@@ -38,12 +42,27 @@ except ImportError:
     print("⚠️  dlib not available - some facial detection features will be limited")
     DLIB_AVAILABLE = False
     dlib = None
+
+# Numba is optional - the landmark and span kernels fall back to NumPy without it
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    njit = None
+
+# pybase64 (SIMD base64) is optional - legacy text frames fall back to the stdlib decoder
+try:
+    from pybase64 import b64decode
+except ImportError:
+    from base64 import b64decode
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 import uvicorn
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool
 import logging
 
 # Configure logging
@@ -53,11 +72,25 @@ logger = logging.getLogger(__name__)
 # --- Configuration ---
 DLIB_MODEL = "shape_predictor_68_face_landmarks.dat"
 DLIB_URL = "http://dlib.net/files/shape_predictor_68_face_landmarks.dat.bz2"
+JPEG_DATA_URL_PREFIX = "data:image/jpeg;base64,"
+IMAGE_MAGIC = (b"\xff\xd8", b"\x89PNG")  # JPEG / PNG signatures
+YUNET_MODEL = "face_detection_yunet_2023mar.onnx"
+YUNET_URL = "https://github.com/opencv/opencv_zoo/raw/main/models/face_detection_yunet/face_detection_yunet_2023mar.onnx"
+YUNET_SCORE_THRESH = 0.6
+YUNET_NMS_THRESH = 0.3
+YUNET_DOWNLOAD_TIMEOUT = 15  # Seconds; YuNet is optional, so never block startup on it
 
 # Attention analysis parameters
 EAR_THRESH = 0.23     # Eye Aspect Ratio threshold
 ANGLE_MAX = 20        # Max head tilt (degrees)
 CLAHE_CLIP = 3.0
+WORK_WIDTH = 480      # Frames wider than this are downscaled before enhancement/detection
+MIN_CAMERA_QUALITY = 10.0  # Below this the frame is too dark/flat to bother detecting faces
+STATS_EVERY_N_FRAMES = 10  # Session stats ride along with every Nth metrics message
+ANALYSIS_INTERVAL_MIN = 0.2   # Seconds between full analyses while attention is changing
+ANALYSIS_INTERVAL_MAX = 1.0   # Longest gap between analyses once attention is stable
+ANALYSIS_BACKOFF = 1.5        # Interval growth factor per stable analysis
+CAMERA_QUALITY_JITTER = 5.0   # Quality change (points) still considered stable
 
 # Database Configuration
 SUPABASE_URL = os.getenv('VITE_SUPABASE_URL')
@@ -95,30 +128,41 @@ def get_db_config():
         logger.error(f"Error parsing database config: {e}")
         return None
 
-def get_db_connection():
-    """Get database connection with fallback to connection pooler port"""
+def get_db_pool():
+    """Get the shared connection pool, creating it on first use with fallback to connection pooler port"""
+    global DB_POOL
     if not DB_CONFIG:
         return None
-        
-    # Try standard port first
-    configs_to_try = [
-        DB_CONFIG,  # Standard port 5432
-        {**DB_CONFIG, 'port': 6543}  # Connection pooler port fallback
-    ]
     
-    for i, config in enumerate(configs_to_try):
-        try:
-            logger.info(f"Attempting connection to {config['host']}:{config['port']} (attempt {i+1})")
-            conn = psycopg2.connect(**config)
-            logger.info(f"✅ Successfully connected to database on port {config['port']}")
-            return conn
-        except psycopg2.OperationalError as e:
-            logger.warning(f"❌ Connection failed on port {config['port']}: {str(e)}")
-            if i == len(configs_to_try) - 1:  # Last attempt
-                raise
+    with DB_POOL_LOCK:
+        if DB_POOL is not None:
+            return DB_POOL
+        
+        # Try standard port first
+        configs_to_try = [
+            DB_CONFIG,  # Standard port 5432
+            {**DB_CONFIG, 'port': 6543}  # Connection pooler port fallback
+        ]
+        
+        for i, config in enumerate(configs_to_try):
+            try:
+                logger.info(f"Attempting connection to {config['host']}:{config['port']} (attempt {i+1})")
+                DB_POOL = ThreadedConnectionPool(minconn=1, maxconn=DB_POOL_MAXCONN, **config)
+                logger.info(f"✅ Successfully connected to database on port {config['port']}")
+                return DB_POOL
+            except psycopg2.OperationalError as e:
+                logger.warning(f"❌ Connection failed on port {config['port']}: {str(e)}")
+                if i == len(configs_to_try) - 1:  # Last attempt
+                    raise
     return None
 
 DB_CONFIG = get_db_config()
+# Connections are reused across sessions instead of paying TCP+TLS+auth on every save
+DB_POOL_MAXCONN = 10
+DB_POOL: Optional[ThreadedConnectionPool] = None
+DB_POOL_LOCK = threading.Lock()
+# Saves run on their own executor sized to the pool, so getconn() never runs out of connections
+DB_EXECUTOR = ThreadPoolExecutor(max_workers=DB_POOL_MAXCONN, thread_name_prefix="attention-db")
 TILE_GRID = (8, 8)
 
 # --- Pydantic Models ---
@@ -169,21 +213,75 @@ def ensure_dlib_shape_predictor():
     os.remove(bz2_path)
     logger.info(f"Model ready: {DLIB_MODEL}")
 
+def ensure_yunet_model() -> bool:
+    """Download the OpenCV YuNet face detector if not present; False if it is unavailable"""
+    if not hasattr(cv2, 'FaceDetectorYN'):
+        logger.warning("OpenCV build has no FaceDetectorYN - YuNet face detection disabled")
+        return False
+    if os.path.exists(YUNET_MODEL):
+        return True
+    logger.info("Downloading YuNet face detector (~230KB) ...")
+    import urllib.request
+    import tempfile
+    # Download next to the target and rename into place, so a partial file is never left behind
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(YUNET_MODEL)), suffix=".part")
+    try:
+        with urllib.request.urlopen(YUNET_URL, timeout=YUNET_DOWNLOAD_TIMEOUT) as response, os.fdopen(fd, "wb") as f_out:
+            f_out.write(response.read())
+        os.replace(tmp_path, YUNET_MODEL)
+    except Exception as e:
+        logger.warning(f"Could not download YuNet model - falling back to other detectors: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+    logger.info(f"Model ready: {YUNET_MODEL}")
+    return True
+
+def create_yunet_detector():
+    """Build a YuNet face detector from the downloaded model"""
+    return cv2.FaceDetectorYN.create(YUNET_MODEL, "", (320, 320), YUNET_SCORE_THRESH, YUNET_NMS_THRESH, 5000)
+
+def frame_payload_to_bytes(frame_data: Union[bytes, str]) -> bytes:
+    """Return raw image bytes from a binary frame or a legacy base64 (data URL) frame"""
+    if isinstance(frame_data, bytes):
+        frame_bytes = frame_data
+    elif frame_data.startswith(JPEG_DATA_URL_PREFIX):
+        # Canvas data URLs always use this prefix and are correctly padded
+        frame_bytes = b64decode(frame_data[len(JPEG_DATA_URL_PREFIX):])
+    else:
+        # Extract base64 data (remove data URL prefix if present)
+        base64_data = frame_data.split(',')[1] if ',' in frame_data else frame_data
+        
+        # Fix base64 padding if needed
+        missing_padding = len(base64_data) % 4
+        if missing_padding:
+            base64_data += '=' * (4 - missing_padding)
+        
+        frame_bytes = b64decode(base64_data)
+    
+    # Reject anything that is not an image before it reaches the decoder
+    if not frame_bytes.startswith(IMAGE_MAGIC):
+        raise ValueError("Frame is not a JPEG or PNG image")
+    return frame_bytes
+
 def shape_to_np(shape, dtype="int"):
     """Convert dlib shape to numpy array"""
-    coords = np.zeros((68, 2), dtype=dtype)
-    for i in range(68):
-        coords[i] = (shape.part(i).x, shape.part(i).y)
+    # parts() fetches all points in a single call; filling each column from a flat
+    # list avoids building a tuple per point
+    parts = shape.parts()
+    coords = np.empty((len(parts), 2), dtype=dtype)
+    coords[:, 0] = [p.x for p in parts]
+    coords[:, 1] = [p.y for p in parts]
     return coords
 
-def eye_aspect_ratio(eye_pts):
-    """Calculate Eye Aspect Ratio"""
-    A = np.linalg.norm(eye_pts[1] - eye_pts[5])  # p2-p6
-    B = np.linalg.norm(eye_pts[2] - eye_pts[4])  # p3-p5
-    C = np.linalg.norm(eye_pts[0] - eye_pts[3])  # p1-p4
-    if C == 0:
-        return 0.0
-    return (A + B) / (2.0 * C)
+def eye_aspect_ratio(eyes):
+    """Calculate Eye Aspect Ratio for stacked eyes of shape (n, 6, 2)"""
+    A = np.hypot(*(eyes[:, 1] - eyes[:, 5]).T)  # p2-p6
+    B = np.hypot(*(eyes[:, 2] - eyes[:, 4]).T)  # p3-p5
+    C = np.hypot(*(eyes[:, 0] - eyes[:, 3]).T)  # p1-p4
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ear = np.where(C == 0, 0.0, (A + B) / (2.0 * C))
+    return ear
 
 def angle_between_eyes(left_center, right_center):
     """Calculate head tilt angle"""
@@ -193,14 +291,89 @@ def angle_between_eyes(left_center, right_center):
         return 90.0
     return abs(math.degrees(math.atan2(dy, dx)))
 
-def calculate_camera_quality(gray_frame):
+def _landmark_metrics_numpy(landmarks):
+    """Mean Eye Aspect Ratio and head tilt from 68-point landmarks"""
+    # Left eye 36-41, right eye 42-47
+    eyes = landmarks[36:48].reshape(2, 6, 2)
+    left_center, right_center = eyes.mean(axis=1)
+    return float(eye_aspect_ratio(eyes).mean()), angle_between_eyes(left_center, right_center)
+
+def _attention_spans_numpy(attentive):
+    """Lengths of attentive runs and number of breaks from a uint8 flag array"""
+    edges = np.diff(attentive.astype(np.int8), prepend=0, append=0)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    # A break is a span interrupted by an inattentive frame (not one cut off by session end)
+    return ends - starts, int(np.count_nonzero(ends < attentive.size))
+
+if NUMBA_AVAILABLE:
+    # Explicit signatures compile the kernels at import instead of on the first live frame
+    @njit("UniTuple(float64, 2)(float64[:, ::1])", cache=True, fastmath=True)
+    def _landmark_metrics_jit(landmarks):
+        """Mean Eye Aspect Ratio and head tilt from 68-point landmarks (single fused pass)"""
+        ear_sum = 0.0
+        for base in (36, 42):
+            A = math.hypot(landmarks[base + 1, 0] - landmarks[base + 5, 0], landmarks[base + 1, 1] - landmarks[base + 5, 1])
+            B = math.hypot(landmarks[base + 2, 0] - landmarks[base + 4, 0], landmarks[base + 2, 1] - landmarks[base + 4, 1])
+            C = math.hypot(landmarks[base, 0] - landmarks[base + 3, 0], landmarks[base, 1] - landmarks[base + 3, 1])
+            if C != 0:
+                ear_sum += (A + B) / (2.0 * C)
+        
+        # Eye centers for the tilt angle
+        lx = ly = rx = ry = 0.0
+        for k in range(6):
+            lx += landmarks[36 + k, 0]
+            ly += landmarks[36 + k, 1]
+            rx += landmarks[42 + k, 0]
+            ry += landmarks[42 + k, 1]
+        dx = (rx - lx) / 6.0
+        dy = (ry - ly) / 6.0
+        tilt = 90.0 if dx == 0 else abs(math.degrees(math.atan2(dy, dx)))
+        return ear_sum / 2.0, tilt
+    
+    @njit("Tuple((int64[:], int64))(uint8[::1])", cache=True)
+    def _attention_spans_jit(attentive):
+        """Lengths of attentive runs and number of breaks from a uint8 flag array"""
+        spans = np.empty(attentive.size, dtype=np.int64)
+        count = 0
+        current_span = 0
+        breaks = 0
+        for flag in attentive:
+            if flag:
+                current_span += 1
+            elif current_span > 0:
+                spans[count] = current_span
+                count += 1
+                current_span = 0
+                breaks += 1
+        if current_span > 0:
+            spans[count] = current_span
+            count += 1
+        return spans[:count], breaks
+    
+    landmark_metrics = _landmark_metrics_jit
+    attention_spans = _attention_spans_jit
+else:
+    landmark_metrics = _landmark_metrics_numpy
+    attention_spans = _attention_spans_numpy
+
+def next_analysis_interval(interval: float, previous, current) -> float:
+    """Back off analysis while the attention state is stable, snap back on any change"""
+    if (previous is None
+            or previous.is_attentive != current.is_attentive
+            or previous.face_detected != current.face_detected
+            or abs(previous.camera_quality - current.camera_quality) > CAMERA_QUALITY_JITTER):
+        return ANALYSIS_INTERVAL_MIN
+    return min(ANALYSIS_INTERVAL_MAX, interval * ANALYSIS_BACKOFF)
+
+def calculate_camera_quality(gray_frame, laplacian_buf=None):
     """Calculate camera quality score based on contrast and sharpness"""
     # Calculate contrast (standard deviation of pixel intensities)
-    contrast = np.std(gray_frame)
+    contrast = cv2.meanStdDev(gray_frame)[1][0, 0]
     
-    # Calculate sharpness using Laplacian variance
-    laplacian = cv2.Laplacian(gray_frame, cv2.CV_64F)
-    sharpness = laplacian.var()
+    # Calculate sharpness using Laplacian variance (int16 holds the 3x3 response of uint8 input)
+    laplacian = cv2.Laplacian(gray_frame, cv2.CV_16S, dst=laplacian_buf)
+    sharpness = cv2.meanStdDev(laplacian)[1][0, 0] ** 2
     
     # Normalize to 0-100 scale
     quality_score = min(100, (contrast / 64) * 50 + (sharpness / 1000) * 50)
@@ -211,176 +384,133 @@ class AttentionAnalyzer:
     def __init__(self):
         if DLIB_AVAILABLE:
             ensure_dlib_shape_predictor()
-            self.detector = dlib.get_frontal_face_detector()
+            # The shape predictor is read-only after loading and safe to share between threads
             self.predictor = dlib.shape_predictor(DLIB_MODEL)
         else:
-            self.detector = None
             self.predictor = None
             print("⚠️  Running without dlib - using basic OpenCV face detection")
         self.sessions: Dict[str, Dict] = {}
         
-    async def analyze_frame(self, frame_data: str, session_id: str) -> AttentionMetrics:
-        """Analyze a single frame for attention metrics"""
+        # Pick the detection path once instead of checking availability every frame:
+        # YuNet (single fixed-cost DNN pass) when its model is available, else dlib HOG, else Haar
+        self.yunet_available = ensure_yunet_model()
+        if self.yunet_available:
+            # Load the model once here so a corrupt file falls back instead of breaking every worker
+            try:
+                create_yunet_detector()
+            except Exception as e:
+                logger.warning(f"YuNet model could not be loaded - falling back to other detectors: {e}")
+                self.yunet_available = False
+        if self.yunet_available:
+            self.detector_name = "yunet"
+            self._detect_and_measure = self._detect_yunet
+        elif self.predictor is not None:
+            self.detector_name = "dlib"
+            self._detect_and_measure = self._detect_dlib
+        else:
+            self.detector_name = "haar"
+            self._detect_and_measure = self._detect_haar
+        logger.info(f"Face detector: {self.detector_name}")
+        
+        # Frame analysis runs on this pool; CLAHE and the face detectors keep internal
+        # buffers, so each worker thread builds its own copies once at startup
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(
+            max_workers=os.cpu_count(),
+            thread_name_prefix="attention",
+            initializer=self._init_worker
+        )
+    
+    def _init_worker(self):
+        """Build the per-thread CLAHE object and face detectors"""
+        self._local.clahe = cv2.createCLAHE(clipLimit=CLAHE_CLIP, tileGridSize=TILE_GRID)
+        self._local.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        self._local.detector = dlib.get_frontal_face_detector() if DLIB_AVAILABLE else None
+        self._local.yunet = create_yunet_detector() if self.yunet_available else None
+        self._local.yunet_size = (320, 320)
+        
+    async def analyze_frame(self, frame_data: Union[bytes, str], session_id: str) -> Optional[AttentionMetrics]:
+        """Analyze a single frame for attention metrics; None if the frame could not be analyzed"""
         try:
-            logger.info(f"📊 Analyzing frame for session: {session_id}")
-            
-            # Decode base64 frame
-            # Extract base64 data (remove data URL prefix if present)
-            base64_data = frame_data.split(',')[1] if ',' in frame_data else frame_data
-            
-            # Fix base64 padding if needed
-            missing_padding = len(base64_data) % 4
-            if missing_padding:
-                base64_data += '=' * (4 - missing_padding)
-            
-            frame_bytes = base64.b64decode(base64_data)
-            nparr = np.frombuffer(frame_bytes, np.uint8)
-            frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            if frame is None:
-                raise ValueError("Could not decode frame")
-                
-            logger.info(f"🎥 Frame decoded successfully: {frame.shape}")
-            
-            # Convert to grayscale and enhance
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            clahe = cv2.createCLAHE(clipLimit=CLAHE_CLIP, tileGridSize=TILE_GRID)
-            gray = clahe.apply(gray)
-            
-            # Calculate camera quality
-            camera_quality = calculate_camera_quality(gray)
-            logger.info(f"📷 Camera quality: {camera_quality:.2f}")
-            
-            # Detect faces
-            if DLIB_AVAILABLE and self.detector is not None:
-                logger.info("🤖 Using dlib face detection model...")
-                # Use dlib for better accuracy
-                faces = self.detector(gray, 1)
-                face_detected = len(faces) > 0
-                logger.info(f"👤 Dlib detected {len(faces)} face(s)")
-                
-                if face_detected:
-                    # Use largest face
-                    def rect_area(r): return (r.right() - r.left()) * (r.bottom() - r.top())
-                    faces = sorted(faces, key=rect_area, reverse=True)
-                    face = faces[0]
-                    
-                    # Get facial landmarks
-                    shape = self.predictor(gray, face)
-                    landmarks = shape_to_np(shape)
-                    logger.info(f"🎯 Extracted {len(landmarks)} facial landmarks using dlib")
-                    
-                    # Extract eye regions
-                    left_eye_pts = landmarks[36:42]   # Left eye landmarks
-                    right_eye_pts = landmarks[42:48]  # Right eye landmarks
-                    
-                    left_center = np.mean(left_eye_pts, axis=0)
-                    right_center = np.mean(right_eye_pts, axis=0)
-                    
-                    # Calculate detailed metrics using dlib landmarks
-                    ear_left = eye_aspect_ratio(left_eye_pts)
-                    ear_right = eye_aspect_ratio(right_eye_pts) 
-                    eye_aspect_ratio_value = (ear_left + ear_right) / 2
-                    head_tilt_degrees = angle_between_eyes(left_center, right_center)
-                    
-                    logger.info(f"👁️  Dlib Analysis - Eye ratio: {eye_aspect_ratio_value:.3f}, Head tilt: {head_tilt_degrees:.1f}°")
-                else:
-                    eye_aspect_ratio_value = 0.0
-                    head_tilt_degrees = 0.0
-            else:
-                logger.info("🔧 Using OpenCV Haar Cascade fallback (dlib not available)")
-                # Fallback to OpenCV Haar Cascade
-                face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-                faces = face_cascade.detectMultiScale(gray, 1.3, 5)
-                face_detected = len(faces) > 0
-                logger.info(f"👤 OpenCV detected {len(faces)} face(s)")
-                
-                if face_detected:
-                    # Use basic metrics without detailed landmarks
-                    eye_aspect_ratio_value = 0.3  # Default reasonable value
-                    head_tilt_degrees = 0.0  # Cannot calculate without landmarks
-                    logger.info("👁️  OpenCV Analysis - Using default values (no landmark detection)")
-                else:
-                    eye_aspect_ratio_value = 0.0
-                    head_tilt_degrees = 0.0
-            if not face_detected:
-                # No face detected
-                metrics = AttentionMetrics(
-                    session_id=session_id,
-                    timestamp=datetime.now(timezone.utc),
-                    is_attentive=False,
-                    attention_percentage=0.0,
-                    eye_aspect_ratio=0.0,
-                    head_tilt_degrees=0.0,
-                    face_detected=False,
-                    camera_quality=camera_quality
-                )
-                await self._update_session_metrics(session_id, metrics)
-                return metrics
-            
-            # Determine attention state based on available metrics
-            # Calculate gradual attention percentage based on metrics
-            # Eye score: Normalized EAR value (0.0 to 1.0)
-            # EAR typically ranges from 0.0 (closed) to 0.4 (wide open)
-            # We'll map 0.0-0.15 as poor, 0.15-0.23 as moderate, 0.23+ as good
-            eye_score = 0.0
-            if eye_aspect_ratio_value <= 0.15:
-                # Eyes mostly closed (0-30%)
-                eye_score = (eye_aspect_ratio_value / 0.15) * 0.3
-            elif eye_aspect_ratio_value < EAR_THRESH:
-                # Eyes partially open (30-70%)
-                eye_score = 0.3 + ((eye_aspect_ratio_value - 0.15) / (EAR_THRESH - 0.15)) * 0.4
-            else:
-                # Eyes fully open (70-100%)
-                excess = min(eye_aspect_ratio_value - EAR_THRESH, 0.17)  # Cap at 0.4
-                eye_score = 0.7 + (excess / 0.17) * 0.3
-            
-            # Head pose score: Normalized head tilt (0.0 to 1.0)
-            # 0° = perfect (100%), 20° = threshold (70%), 45° = poor (0%)
-            if head_tilt_degrees <= ANGLE_MAX:
-                # Good range (70-100%)
-                head_score = 0.7 + (1.0 - (head_tilt_degrees / ANGLE_MAX)) * 0.3
-            elif head_tilt_degrees <= 45:
-                # Moderate to poor range (0-70%)
-                head_score = 0.7 * (1.0 - ((head_tilt_degrees - ANGLE_MAX) / (45 - ANGLE_MAX)))
-            else:
-                # Very poor attention
-                head_score = 0.0
-            
-            # Weighted combination: 60% eye, 40% head pose
-            attention_percentage = (eye_score * 60) + (head_score * 40)
-            attention_percentage = max(0, min(100, attention_percentage))  # Clamp to 0-100
-            
-            # Determine if attentive (for backward compatibility)
-            is_attentive = attention_percentage >= 60
-            
-            if DLIB_AVAILABLE and self.detector is not None:
-                logger.info(f"🎯 Dlib-based attention analysis:")
-            else:
-                logger.info(f"🔧 OpenCV-based attention analysis:")
-            
-            logger.info(f"   EAR: {eye_aspect_ratio_value:.3f} → Eye Score: {eye_score*100:.1f}%")
-            logger.info(f"   Head Tilt: {head_tilt_degrees:.1f}° → Head Score: {head_score*100:.1f}%")
-            logger.info(f"📈 Final Attention Result: {attention_percentage:.1f}% ({'ATTENTIVE' if is_attentive else 'DISTRACTED'})")
-            
-            metrics = AttentionMetrics(
-                session_id=session_id,
-                timestamp=datetime.now(timezone.utc),
-                is_attentive=is_attentive,
-                attention_percentage=attention_percentage,
-                eye_aspect_ratio=eye_aspect_ratio_value,
-                head_tilt_degrees=head_tilt_degrees,
-                face_detected=True,
-                camera_quality=camera_quality
-            )
-            
+            # Decoding, enhancement and detection are CPU-bound; run them off the event loop
+            loop = asyncio.get_running_loop()
+            metrics = await loop.run_in_executor(self._pool, self._analyze_sync, frame_data, session_id)
             await self._update_session_metrics(session_id, metrics)
             return metrics
             
         except Exception as e:
             logger.error(f"Error analyzing frame: {str(e)}")
-            # Return default metrics on error
-            return AttentionMetrics(
+            return None
+    
+    @staticmethod
+    def error_metrics(session_id: str) -> AttentionMetrics:
+        """Default metrics reported for a frame that failed analysis (never recorded in session stats)"""
+        return AttentionMetrics(
+            session_id=session_id,
+            timestamp=datetime.now(timezone.utc),
+            is_attentive=False,
+            attention_percentage=0.0,
+            eye_aspect_ratio=0.0,
+            head_tilt_degrees=0.0,
+            face_detected=False,
+            camera_quality=0.0
+        )
+    
+    async def repeat_metrics(self, frame_data: Union[bytes, str], session_id: str,
+                             last_metrics: AttentionMetrics) -> Optional[AttentionMetrics]:
+        """Record the previous frame's result for a skipped frame; None if the frame is not an image"""
+        try:
+            # Skipped frames are not decoded, but the cheap payload check still rejects garbage
+            frame_payload_to_bytes(frame_data)
+            metrics = last_metrics.model_copy(update={'timestamp': datetime.now(timezone.utc)})
+            await self._update_session_metrics(session_id, metrics)
+            return metrics
+            
+        except Exception as e:
+            logger.error(f"Error reusing frame metrics: {str(e)}")
+            return None
+    
+    def _analyze_sync(self, frame_data: Union[bytes, str], session_id: str) -> AttentionMetrics:
+        """Decode and analyze a frame (runs on a worker thread)"""
+        logger.debug("📊 Analyzing frame for session: %s", session_id)
+        
+        frame_bytes = frame_payload_to_bytes(frame_data)
+        nparr = np.frombuffer(frame_bytes, np.uint8)
+        # Decode straight to grayscale - the color frame is never used
+        gray = cv2.imdecode(nparr, cv2.IMREAD_GRAYSCALE)
+        
+        if gray is None:
+            raise ValueError("Could not decode frame")
+            
+        logger.debug("🎥 Frame decoded successfully: %s", gray.shape)
+        
+        session = self.sessions.get(session_id)
+        
+        # Downscale to the working width and enhance, writing into the session's reusable buffers
+        scale = min(1.0, WORK_WIDTH / gray.shape[1])
+        if scale < 1.0:
+            size = (round(gray.shape[1] * scale), round(gray.shape[0] * scale))
+            gray = cv2.resize(gray, size, dst=self._session_buffer(session, 'resized', (size[1], size[0])),
+                              interpolation=cv2.INTER_AREA)
+        gray = self._local.clahe.apply(gray, self._session_buffer(session, 'clahe', gray.shape))
+        
+        # Calculate camera quality
+        camera_quality = calculate_camera_quality(gray, self._session_buffer(session, 'laplacian', gray.shape, np.int16))
+        logger.debug("📷 Camera quality: %.2f", camera_quality)
+        
+        # Detect faces
+        if camera_quality < MIN_CAMERA_QUALITY:
+            # Camera still starting up or covered - skip detection entirely
+            logger.debug("⏭️  Camera quality too low - skipping face detection")
+            face_detected, eye_aspect_ratio_value, head_tilt_degrees = False, 0.0, 0.0
+            if session is not None:
+                session['last_face_rect'] = None
+        else:
+            face_detected, eye_aspect_ratio_value, head_tilt_degrees = self._detect_and_measure(gray, session, scale)
+        
+        if not face_detected:
+            # No face detected
+            metrics = AttentionMetrics(
                 session_id=session_id,
                 timestamp=datetime.now(timezone.utc),
                 is_attentive=False,
@@ -388,8 +518,151 @@ class AttentionAnalyzer:
                 eye_aspect_ratio=0.0,
                 head_tilt_degrees=0.0,
                 face_detected=False,
-                camera_quality=0.0
+                camera_quality=camera_quality
             )
+            return metrics
+        
+        # Determine attention state based on available metrics
+        # Calculate gradual attention percentage based on metrics
+        # Eye score: Normalized EAR value (0.0 to 1.0)
+        # EAR typically ranges from 0.0 (closed) to 0.4 (wide open)
+        # We'll map 0.0-0.15 as poor, 0.15-0.23 as moderate, 0.23+ as good
+        eye_score = 0.0
+        if eye_aspect_ratio_value <= 0.15:
+            # Eyes mostly closed (0-30%)
+            eye_score = (eye_aspect_ratio_value / 0.15) * 0.3
+        elif eye_aspect_ratio_value < EAR_THRESH:
+            # Eyes partially open (30-70%)
+            eye_score = 0.3 + ((eye_aspect_ratio_value - 0.15) / (EAR_THRESH - 0.15)) * 0.4
+        else:
+            # Eyes fully open (70-100%)
+            excess = min(eye_aspect_ratio_value - EAR_THRESH, 0.17)  # Cap at 0.4
+            eye_score = 0.7 + (excess / 0.17) * 0.3
+        
+        # Head pose score: Normalized head tilt (0.0 to 1.0)
+        # 0° = perfect (100%), 20° = threshold (70%), 45° = poor (0%)
+        if head_tilt_degrees <= ANGLE_MAX:
+            # Good range (70-100%)
+            head_score = 0.7 + (1.0 - (head_tilt_degrees / ANGLE_MAX)) * 0.3
+        elif head_tilt_degrees <= 45:
+            # Moderate to poor range (0-70%)
+            head_score = 0.7 * (1.0 - ((head_tilt_degrees - ANGLE_MAX) / (45 - ANGLE_MAX)))
+        else:
+            # Very poor attention
+            head_score = 0.0
+        
+        # Weighted combination: 60% eye, 40% head pose
+        attention_percentage = (eye_score * 60) + (head_score * 40)
+        attention_percentage = max(0, min(100, attention_percentage))  # Clamp to 0-100
+        
+        # Determine if attentive (for backward compatibility)
+        is_attentive = attention_percentage >= 60
+        
+        # Per-frame detail is debug-only; the f-strings are skipped entirely at INFO level
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"   EAR: {eye_aspect_ratio_value:.3f} → Eye Score: {eye_score*100:.1f}%")
+            logger.debug(f"   Head Tilt: {head_tilt_degrees:.1f}° → Head Score: {head_score*100:.1f}%")
+            logger.debug(f"📈 Final Attention Result: {attention_percentage:.1f}% ({'ATTENTIVE' if is_attentive else 'DISTRACTED'})")
+        
+        metrics = AttentionMetrics(
+            session_id=session_id,
+            timestamp=datetime.now(timezone.utc),
+            is_attentive=is_attentive,
+            attention_percentage=attention_percentage,
+            eye_aspect_ratio=eye_aspect_ratio_value,
+            head_tilt_degrees=head_tilt_degrees,
+            face_detected=True,
+            camera_quality=camera_quality
+        )
+        
+        return metrics
+    
+    def _detect_dlib(self, gray, session: Optional[Dict], scale: float) -> Tuple[bool, float, float]:
+        """Detect the largest face with dlib and measure EAR and head tilt from its landmarks"""
+        faces = self._detect_faces_dlib(gray, session)
+        logger.debug("👤 Dlib detected %d face(s)", len(faces))
+        if len(faces) == 0:
+            if session is not None:
+                session['last_face_rect'] = None
+            return False, 0.0, 0.0
+        
+        # Use largest face
+        face = max(faces, key=lambda r: (r.right() - r.left()) * (r.bottom() - r.top()))
+        if session is not None:
+            session['last_face_rect'] = (face.left(), face.top(), face.right(), face.bottom())
+        
+        # Get facial landmarks, mapped back to full-resolution coordinates
+        landmarks = shape_to_np(self.predictor(gray, face)) / scale
+        eye_aspect_ratio_value, head_tilt_degrees = landmark_metrics(landmarks)
+        return True, eye_aspect_ratio_value, head_tilt_degrees
+    
+    def _detect_yunet(self, gray, session: Optional[Dict], scale: float) -> Tuple[bool, float, float]:
+        """Detect the largest face with YuNet; landmarks come from dlib when available"""
+        yunet = self._local.yunet
+        size = (gray.shape[1], gray.shape[0])
+        if self._local.yunet_size != size:
+            yunet.setInputSize(size)
+            self._local.yunet_size = size
+        
+        # YuNet expects a 3-channel image; the enhanced grayscale frame is replicated
+        bgr = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR, dst=self._session_buffer(session, 'bgr', gray.shape + (3,)))
+        _, faces = yunet.detect(bgr)
+        logger.debug("👤 YuNet detected %d face(s)", 0 if faces is None else len(faces))
+        if faces is None or len(faces) == 0:
+            return False, 0.0, 0.0
+        
+        # Each row: x, y, w, h, then (x, y) for right eye, left eye, nose tip, mouth corners, score
+        face = faces[np.argmax(faces[:, 2] * faces[:, 3])]
+        
+        if self.predictor is not None:
+            x, y, w, h = face[:4]
+            rect = dlib.rectangle(int(x), int(y), int(x + w), int(y + h))
+            # Get facial landmarks, mapped back to full-resolution coordinates
+            landmarks = shape_to_np(self.predictor(gray, rect)) / scale
+            eye_aspect_ratio_value, head_tilt_degrees = landmark_metrics(landmarks)
+            return True, eye_aspect_ratio_value, head_tilt_degrees
+        
+        # Without dlib there is no eye contour for EAR, but YuNet's eye points still give the tilt
+        return True, 0.3, angle_between_eyes(face[4:6], face[6:8])
+    
+    def _detect_haar(self, gray, session: Optional[Dict], scale: float) -> Tuple[bool, float, float]:
+        """Detect faces with the OpenCV Haar cascade (no landmarks, so EAR/tilt use defaults)"""
+        faces = self._local.face_cascade.detectMultiScale(gray, 1.3, 5)
+        logger.debug("👤 OpenCV detected %d face(s)", len(faces))
+        if len(faces) == 0:
+            return False, 0.0, 0.0
+        # Default reasonable EAR; tilt cannot be calculated without landmarks
+        return True, 0.3, 0.0
+    
+    @staticmethod
+    def _session_buffer(session: Optional[Dict], name: str, shape: Tuple[int, ...], dtype=np.uint8):
+        """Reusable per-session output array, reallocated only when the frame size changes"""
+        if session is None:
+            return None
+        buffers = session['buffers']
+        buf = buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = buffers[name] = np.empty(shape, dtype=dtype)
+        return buf
+    
+    def _detect_faces_dlib(self, gray, session: Optional[Dict]):
+        """Run dlib face detection, searching around the previous face first"""
+        last_rect = session.get('last_face_rect') if session is not None else None
+        if last_rect is not None:
+            # Search a dilated window around last frame's face before scanning the whole frame
+            left, top, right, bottom = last_rect
+            pad_x = (right - left) // 2
+            pad_y = (bottom - top) // 2
+            x0, y0 = max(0, left - pad_x), max(0, top - pad_y)
+            x1, y1 = min(gray.shape[1], right + pad_x), min(gray.shape[0], bottom + pad_y)
+            if x1 > x0 and y1 > y0:
+                roi_faces = self._local.detector(np.ascontiguousarray(gray[y0:y1, x0:x1]), 0)
+                if len(roi_faces) > 0:
+                    return [dlib.rectangle(r.left() + x0, r.top() + y0, r.right() + x0, r.bottom() + y0)
+                            for r in roi_faces]
+        
+        # No pyramid upsampling: faces are large at webcam distance
+        return self._local.detector(gray, 0)
     
     async def _update_session_metrics(self, session_id: str, metrics: AttentionMetrics):
         """Update running session statistics"""
@@ -397,28 +670,37 @@ class AttentionAnalyzer:
             return
             
         session = self.sessions[session_id]
-        session['frames'].append({
-            'timestamp': metrics.timestamp,
-            'is_attentive': metrics.is_attentive,
-            'ear': metrics.eye_aspect_ratio,
-            'tilt': metrics.head_tilt_degrees,
-            'face_detected': metrics.face_detected,
-            'camera_quality': metrics.camera_quality
-        })
-        
-        # Update running statistics
-        total_frames = len(session['frames'])
-        attentive_frames = sum(1 for f in session['frames'] if f['is_attentive'])
+        session['attentive_bits'].append(1 if metrics.is_attentive else 0)
+        # Per-frame history kept as typed columns (the attentive flag is attentive_bits)
+        columns = session['frame_columns']
+        columns['ts'].append(metrics.timestamp.timestamp())
+        columns['ear'].append(metrics.eye_aspect_ratio)
+        columns['tilt'].append(metrics.head_tilt_degrees)
+        columns['quality'].append(metrics.camera_quality)
+        
+        # Update running statistics incrementally so each frame costs O(1)
+        acc = session['stats_accum']
+        acc['total'] += 1
+        acc['q_sum'] += metrics.camera_quality
+        if metrics.is_attentive:
+            acc['attentive'] += 1
+        if metrics.face_detected:
+            acc['face'] += 1
+            acc['ear_sum'] += metrics.eye_aspect_ratio
+            acc['tilt_sum'] += metrics.head_tilt_degrees
+        
+        total_frames = acc['total']
+        face_frames = acc['face']
         
         session['stats'] = {
             'total_frames': total_frames,
-            'attentive_frames': attentive_frames,
-            'attention_score': (attentive_frames / total_frames * 100) if total_frames > 0 else 0,
-            'avg_ear': np.mean([f['ear'] for f in session['frames'] if f['face_detected']]) if any(f['face_detected'] for f in session['frames']) else 0,
-            'avg_tilt': np.mean([f['tilt'] for f in session['frames'] if f['face_detected']]) if any(f['face_detected'] for f in session['frames']) else 0,
-            'frames_with_face': sum(1 for f in session['frames'] if f['face_detected']),
-            'frames_without_face': sum(1 for f in session['frames'] if not f['face_detected']),
-            'avg_camera_quality': np.mean([f['camera_quality'] for f in session['frames']])
+            'attentive_frames': acc['attentive'],
+            'attention_score': acc['attentive'] / total_frames * 100,
+            'avg_ear': acc['ear_sum'] / face_frames if face_frames else 0,
+            'avg_tilt': acc['tilt_sum'] / face_frames if face_frames else 0,
+            'frames_with_face': face_frames,
+            'frames_without_face': total_frames - face_frames,
+            'avg_camera_quality': acc['q_sum'] / total_frames
         }
     
     def start_session(self, session_data: AttentionSessionStart) -> str:
@@ -430,43 +712,42 @@ class AttentionAnalyzer:
             'video_url': session_data.video_url,
             'video_duration': session_data.video_duration_seconds,
             'start_time': datetime.now(timezone.utc),
-            'frames': [],
-            'stats': {}
+            'attentive_bits': bytearray(),
+            'frame_columns': {'ts': array('d'), 'ear': array('f'), 'tilt': array('f'), 'quality': array('f')},
+            'buffers': {},
+            'stats': {},
+            'stats_accum': {'total': 0, 'attentive': 0, 'face': 0, 'ear_sum': 0.0, 'tilt_sum': 0.0, 'q_sum': 0.0},
+            'last_face_rect': None
         }
         logger.info(f"Started attention session {session_id} for child {session_data.child_id}")
         return session_id
     
     async def end_session(self, session_id: str, notes: Optional[str] = None) -> SessionSummary:
         """End session and calculate final statistics"""
-        if session_id not in self.sessions:
+        # Take the session out before the save is awaited, so a repeated end request
+        # gets "not found" and frames arriving meanwhile are no longer recorded
+        session = self.sessions.pop(session_id, None)
+        if session is None:
             raise ValueError(f"Session {session_id} not found")
         
-        session = self.sessions[session_id]
         session['end_time'] = datetime.now(timezone.utc)
         
-        # Calculate final statistics
-        frames = session['frames']
-        if not frames:
+        # Work from a copy of the frame history: a view of the live bytearray would block
+        # appends while the save is awaited, and the saved rows must match the summary
+        attentive = np.array(session['attentive_bits'], dtype=np.uint8)
+        if attentive.size == 0:
+            self.sessions[session_id] = session
             raise ValueError("No frames analyzed in session")
+        snapshot = dict(
+            session,
+            attentive_bits=attentive.tobytes(),
+            frame_columns={name: column[:attentive.size] for name, column in session['frame_columns'].items()}
+        )
         
         # Calculate attention breaks and spans
-        attention_spans = []
-        current_span = 0
-        breaks = 0
-        
-        for frame in frames:
-            if frame['is_attentive']:
-                current_span += 1
-            else:
-                if current_span > 0:
-                    attention_spans.append(current_span)
-                    current_span = 0
-                    breaks += 1
+        spans, breaks = attention_spans(attentive)
         
-        if current_span > 0:
-            attention_spans.append(current_span)
-        
-        stats = session['stats']
+        stats = snapshot['stats']
         
         summary = SessionSummary(
             session_id=session_id,
@@ -476,16 +757,13 @@ class AttentionAnalyzer:
             engagement_level='high' if stats.get('attention_score', 0) >= 80 else 'medium' if stats.get('attention_score', 0) >= 50 else 'low',
             total_frames=stats.get('total_frames', 0),
             attentive_frames=stats.get('attentive_frames', 0),
-            attention_breaks=breaks,
-            longest_attention_span=max(attention_spans) if attention_spans else 0,
-            avg_attention_span=np.mean(attention_spans) if attention_spans else 0
+            attention_breaks=int(breaks),
+            longest_attention_span=int(spans.max()) if spans.size else 0,
+            avg_attention_span=float(spans.mean()) if spans.size else 0
         )
         
         # Save to database
-        await self._save_session_to_db(session_id, summary, session, notes)
-        
-        # Clean up session data
-        del self.sessions[session_id]
+        await self._save_session_to_db(session_id, summary, snapshot, notes)
         
         return summary
     
@@ -507,14 +785,68 @@ class AttentionAnalyzer:
                 logger.error("Database configuration not available - skipping save")
                 return
             
-            # Connect to Supabase PostgreSQL with fallback logic
-            conn = get_db_connection()
-            if not conn:
+            # The insert is blocking network I/O; keep it off the event loop
+            loop = asyncio.get_running_loop()
+            saved = await loop.run_in_executor(
+                DB_EXECUTOR, self._insert_session_row, session_id, summary, session, notes, end_time
+            )
+            if not saved:
                 logger.error("Failed to establish database connection")
                 return
-                
-            cursor = conn.cursor()
             
+            duration_minutes = (end_time - start_time).total_seconds() / 60
+            
+            logger.info(f"✅ Session {session_id} saved to database successfully")
+            logger.info(f"   Child ID: {child_id}, Module ID: {module_id}")
+            logger.info(f"   Attention Score: {summary.attention_score:.1f}%")
+            logger.info(f"   Duration: {duration_minutes:.1f} minutes")
+            
+        except Exception as e:
+            logger.error(f"❌ Error saving session to database: {str(e)}")
+            # Don't raise the exception to avoid breaking the session end
+
+    def _insert_session_row(self, session_id: str, summary: SessionSummary, session: dict,
+                            notes: Optional[str], end_time: datetime) -> bool:
+        """Insert the session summary and its frame history using a pooled connection"""
+        pool = get_db_pool()
+        if pool is None:
+            return False
+        
+        for attempt in (1, 2):
+            conn = pool.getconn()
+            try:
+                self._write_session_summary(conn, session_id, summary, session, notes, end_time)
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                # Pooled connection went stale while idle (closed by the server or a NAT);
+                # discard it and retry once on a fresh connection
+                pool.putconn(conn, close=True)
+                if attempt == 2:
+                    raise
+                logger.warning(f"⚠️  Database connection lost, retrying save: {e}")
+                continue
+            except Exception:
+                pool.putconn(conn)
+                raise
+            
+            # Frame history is committed separately so a failure there never loses the summary
+            try:
+                with conn.cursor() as cursor:
+                    self._insert_frame_rows(cursor, session_id, session)
+                conn.commit()
+            except psycopg2.Error as e:
+                logger.warning(f"⚠️  Frame history for session {session_id} not saved: {e}")
+            finally:
+                # putconn rolls back unfinished transactions and discards broken connections
+                pool.putconn(conn)
+            return True
+        return False
+    
+    @staticmethod
+    def _write_session_summary(conn, session_id: str, summary: SessionSummary, session: dict,
+                               notes: Optional[str], end_time: datetime):
+        """Insert and commit the attention_sessions row"""
+        stats = session.get('stats', {})
+        with conn.cursor() as cursor:
             # Insert into attention_sessions table
             insert_query = """
                 INSERT INTO attention_sessions (
@@ -529,21 +861,12 @@ class AttentionAnalyzer:
                 )
             """
             
-            # Prepare data
-            session_data = {
-                'frames_analyzed': summary.total_frames,
-                'attention_scores': [frame.get('attention_score', 0) for frame in session.get('frames', [])],
-                'eye_ratios': [frame.get('eye_aspect_ratio', 0) for frame in session.get('frames', [])],
-                'head_tilts': [frame.get('head_tilt', 0) for frame in session.get('frames', [])],
-                'timestamps': [frame.get('timestamp') for frame in session.get('frames', [])]
-            }
-            
             cursor.execute(insert_query, (
                 session_id,
-                child_id,
-                module_id,
+                session['child_id'],
+                session['module_id'],
                 session.get('video_url', ''),
-                start_time,
+                session.get('start_time'),
                 end_time,
                 session.get('video_duration', 0),
                 summary.total_frames,
@@ -559,19 +882,28 @@ class AttentionAnalyzer:
                 stats.get('frames_without_face', 0),
                 notes
             ))
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
-            logger.info(f"✅ Session {session_id} saved to database successfully")
-            logger.info(f"   Child ID: {child_id}, Module ID: {module_id}")
-            logger.info(f"   Attention Score: {summary.attention_score:.1f}%")
-            logger.info(f"   Duration: {duration_minutes:.1f} minutes")
-            
-        except Exception as e:
-            logger.error(f"❌ Error saving session to database: {str(e)}")
-            # Don't raise the exception to avoid breaking the session end
+        conn.commit()
+    
+    @staticmethod
+    def _insert_frame_rows(cursor, session_id: str, session: dict):
+        """Bulk insert the session's per-frame history into attention_frames"""
+        columns = session['frame_columns']
+        frame_rows = zip(
+            repeat(session_id),
+            columns['ts'],
+            columns['ear'],
+            columns['tilt'],
+            map(bool, session['attentive_bits']),
+            columns['quality']
+        )
+        # Multi-row INSERT pages; timestamps are stored as epoch seconds until here
+        execute_values(
+            cursor,
+            "INSERT INTO attention_frames (session_id, ts, ear, tilt, attentive, quality) VALUES %s",
+            frame_rows,
+            template="(%s, to_timestamp(%s), %s, %s, %s, %s)",
+            page_size=1000
+        )
 
 # --- FastAPI App ---
 app = FastAPI(
@@ -603,7 +935,8 @@ async def health_check():
         "status": "healthy", 
         "service": "attention-analysis",
         "dlib_available": DLIB_AVAILABLE,
-        "model_loaded": os.path.exists(DLIB_MODEL) if DLIB_AVAILABLE else False
+        "model_loaded": os.path.exists(DLIB_MODEL) if DLIB_AVAILABLE else False,
+        "face_detector": analyzer.detector_name
     }
 
 @app.post("/sessions/start")
@@ -647,18 +980,40 @@ async def websocket_attention_analysis(websocket: WebSocket, session_id: str):
     await websocket.accept()
     active_connections[session_id] = websocket
     
+    # Temporal subsampling: attention changes over hundreds of ms, so frames arriving
+    # before the next scheduled analysis reuse the last result without being decoded
+    last_metrics: Optional[AttentionMetrics] = None
+    analysis_interval = ANALYSIS_INTERVAL_MIN
+    next_analysis_at = 0.0
+    
     try:
         logger.info(f"WebSocket connected for session {session_id}")
         
         while True:
-            # Receive frame data
-            frame_data = await websocket.receive_text()
+            # Receive frame data: raw JPEG bytes, or a base64 data URL from older clients
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            frame_data = message["bytes"] if message.get("bytes") is not None else message["text"]
             
-            # Analyze frame
-            metrics = await analyzer.analyze_frame(frame_data, session_id)
+            # Analyze frame, or reuse the last result while the attention state is stable
+            now = time.monotonic()
+            if last_metrics is not None and now < next_analysis_at:
+                metrics = await analyzer.repeat_metrics(frame_data, session_id, last_metrics)
+                if metrics is None:
+                    metrics = analyzer.error_metrics(session_id)
+            else:
+                metrics = await analyzer.analyze_frame(frame_data, session_id)
+                if metrics is None:
+                    # Failed frames are reported but never reused; the next frame is analyzed again
+                    metrics = analyzer.error_metrics(session_id)
+                else:
+                    analysis_interval = next_analysis_interval(analysis_interval, last_metrics, metrics)
+                    last_metrics = metrics
+                    next_analysis_at = now + analysis_interval
             
-            # Send results back
-            await websocket.send_json({
+            # Send results back in a single message; session stats are attached periodically
+            message = {
                 "type": "attention_metrics",
                 "data": {
                     "session_id": metrics.session_id,
@@ -670,15 +1025,15 @@ async def websocket_attention_analysis(websocket: WebSocket, session_id: str):
                     "face_detected": metrics.face_detected,
                     "camera_quality": metrics.camera_quality
                 }
-            })
+            }
             
-            # Send session stats periodically
-            if session_id in analyzer.sessions:
-                stats = analyzer.sessions[session_id].get('stats', {})
-                await websocket.send_json({
-                    "type": "session_stats",
-                    "data": stats
-                })
+            session = analyzer.sessions.get(session_id)
+            if session is not None:
+                stats = session.get('stats', {})
+                if stats.get('total_frames', 0) % STATS_EVERY_N_FRAMES == 0:
+                    message["stats"] = stats
+            
+            await websocket.send_json(message)
     
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected for session {session_id}")
@@ -689,11 +1044,20 @@ async def websocket_attention_analysis(websocket: WebSocket, session_id: str):
             del active_connections[session_id]
 
 if __name__ == "__main__":
-    logger.info("Starting Attention Analysis Service...")
+    # Sessions live in each worker's memory, so running more than one worker
+    # needs sticky routing in front of the service (REST calls and the WebSocket
+    # for a session must reach the same process)
+    workers = int(os.getenv('ATTENTION_WORKERS', '1'))
+    reload = os.getenv('ATTENTION_RELOAD', 'false').lower() in ('1', 'true', 'yes')
+    
+    logger.info(f"Starting Attention Analysis Service ({workers} worker(s), reload={reload})...")
     uvicorn.run(
         "attention_service:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        reload=reload,
+        workers=1 if reload else workers,
+        loop="uvloop",
+        http="httptools",
         log_level="info"
     )
\ No newline at end of file
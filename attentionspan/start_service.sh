@@ -40,6 +40,7 @@ fi
 echo "🚀 Starting FastAPI service on http://localhost:8000"
 echo "📋 API Documentation will be available at http://localhost:8000/docs"
 echo "🔌 WebSocket endpoint: ws://localhost:8000/ws/attention/{session_id}"
+echo "⚙️  Workers: ${ATTENTION_WORKERS:-1} (set ATTENTION_RELOAD=true for auto-reload during development)"
 echo ""
 echo "Press Ctrl+C to stop the service"
 echo ""
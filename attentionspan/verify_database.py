@@ -107,10 +107,32 @@ try:
         
         print("✅ Table created successfully!")
     
+    # Per-frame history lives in its own table, bulk inserted when a session ends
+    print("\n📝 Ensuring table 'attention_frames' exists...")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS attention_frames (
+            session_id UUID NOT NULL REFERENCES attention_sessions(id) ON DELETE CASCADE,
+            ts TIMESTAMPTZ NOT NULL,
+            ear REAL,
+            tilt REAL,
+            attentive BOOLEAN NOT NULL,
+            quality REAL
+        );
+        
+        CREATE INDEX IF NOT EXISTS idx_attention_frames_session ON attention_frames(session_id, ts);
+        
+        -- Never expose frame history to the anon key; read policies live in
+        -- supabase/SQL/create-attention-frames-table.sql
+        ALTER TABLE attention_frames ENABLE ROW LEVEL SECURITY;
+        REVOKE ALL ON attention_frames FROM anon;
+    """)
+    conn.commit()
+    print("✅ Table 'attention_frames' ready!")
+    
     print("\n🎉 Database setup complete!")
     print("\n💡 Your attention tracking data will now be saved to:")
     print(f"   Database: {db_host}")
-    print(f"   Table: attention_sessions")
+    print(f"   Tables: attention_sessions, attention_frames")
     
     cursor.close()
     conn.close()
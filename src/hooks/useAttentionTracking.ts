@@ -85,15 +85,15 @@ export function useAttentionTracking({
     }
   }, []);
 
-  // Capture frame from video and convert to base64
-  const captureFrame = useCallback(() => {
-    if (!videoRef.current || !canvasRef.current) return null;
+  // Capture frame from video and encode it as a JPEG blob
+  const captureFrame = useCallback((onFrame: (frame: Blob) => void) => {
+    if (!videoRef.current || !canvasRef.current) return;
 
     const canvas = canvasRef.current;
     const video = videoRef.current;
     const ctx = canvas.getContext('2d');
 
-    if (!ctx) return null;
+    if (!ctx) return;
 
     // Set canvas dimensions to match video
     canvas.width = video.videoWidth || 640;
@@ -102,8 +102,10 @@ export function useAttentionTracking({
     // Draw current video frame to canvas
     ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
 
-    // Convert to base64
-    return canvas.toDataURL('image/jpeg', 0.8);
+    // Encode to JPEG (sent as a binary WebSocket frame, no base64 overhead)
+    canvas.toBlob((blob) => {
+      if (blob) onFrame(blob);
+    }, 'image/jpeg', 0.8);
   }, []);
 
   // Start attention tracking session
@@ -151,11 +153,12 @@ export function useAttentionTracking({
 
         // Step 3: Start sending frames every 500ms (2 FPS)
         intervalRef.current = setInterval(() => {
-          const frameData = captureFrame();
-          if (frameData && ws.readyState === WebSocket.OPEN) {
-            // Send ONLY the base64 frame data (not wrapped in JSON)
-            ws.send(frameData);
-          }
+          captureFrame((frameBlob) => {
+            if (ws.readyState === WebSocket.OPEN) {
+              // Send the raw JPEG bytes as a binary message
+              ws.send(frameBlob);
+            }
+          });
         }, 500);
       };
 
@@ -241,9 +244,11 @@ export function useAttentionTracking({
                 average_attention_span_seconds: stats.attentionBreaks > 0 ? (stats.attentiveFrames * 0.5) / (stats.attentionBreaks + 1) : stats.attentiveFrames * 0.5
               }).catch(console.error);
             }
-          } else if (response.type === 'session_stats') {
-            // Handle session statistics updates
-            console.log('📈 Session stats:', response.data);
+            
+            // Session statistics are attached to every Nth metrics message
+            if (response.stats) {
+              console.log('📈 Session stats:', response.stats);
+            }
           }
         } catch (err) {
           console.error('Error parsing attention data:', err);
@@ -0,0 +1,92 @@
+-- ============================================
+-- ATTENTION FRAMES TABLE
+-- Per-frame attention history for each attention session
+-- (bulk inserted by the attention service when a session ends)
+-- ============================================
+
+-- Create the attention_frames table
+CREATE TABLE IF NOT EXISTS attention_frames (
+  session_id UUID REFERENCES attention_sessions(id) ON DELETE CASCADE NOT NULL,
+  ts TIMESTAMP WITH TIME ZONE NOT NULL,
+  ear REAL,
+  tilt REAL,
+  attentive BOOLEAN NOT NULL,
+  quality REAL
+);
+
+-- ============================================
+-- INDEXES for better query performance
+-- ============================================
+CREATE INDEX IF NOT EXISTS idx_attention_frames_session ON attention_frames(session_id, ts);
+
+-- ============================================
+-- ROW LEVEL SECURITY (RLS) POLICIES
+-- Read access follows the parent attention session; rows are only
+-- written by the attention service (service role / database owner)
+-- ============================================
+ALTER TABLE attention_frames ENABLE ROW LEVEL SECURITY;
+
+-- Parents can view frame history for their own children
+CREATE POLICY "Parents can view attention frames for their children"
+  ON attention_frames FOR SELECT
+  USING (
+    EXISTS (
+      SELECT 1 FROM attention_sessions
+      JOIN children ON children.id = attention_sessions.child_id
+      WHERE attention_sessions.id = attention_frames.session_id
+      AND children.parent_id = auth.uid()
+    )
+  );
+
+-- Educators can view frame history for assigned children
+CREATE POLICY "Educators can view attention frames for assigned children"
+  ON attention_frames FOR SELECT
+  USING (
+    EXISTS (
+      SELECT 1 FROM attention_sessions
+      JOIN children ON children.id = attention_sessions.child_id
+      WHERE attention_sessions.id = attention_frames.session_id
+      AND (
+        children.educator_id = auth.uid()
+        OR EXISTS (
+          SELECT 1 FROM parent_educator_assignments
+          WHERE educator_id = auth.uid()
+          AND child_id = children.id
+          AND is_active = true
+        )
+      )
+    )
+  );
+
+-- Admins can manage all attention frames
+CREATE POLICY "Admins can manage all attention frames"
+  ON attention_frames FOR ALL
+  USING (
+    EXISTS (
+      SELECT 1 FROM profiles
+      WHERE id = auth.uid() AND role = 'admin'
+    )
+  );
+
+-- ============================================
+-- PERMISSIONS
+-- ============================================
+REVOKE ALL ON attention_frames FROM anon;
+GRANT SELECT ON attention_frames TO authenticated;
+GRANT ALL ON attention_frames TO service_role;
+
+-- ============================================
+-- COMMENTS for documentation
+-- ============================================
+COMMENT ON TABLE attention_frames IS 'Per-frame attention history recorded by the attention service';
+COMMENT ON COLUMN attention_frames.session_id IS 'Reference to the attention session the frame belongs to';
+COMMENT ON COLUMN attention_frames.ts IS 'Time the frame was analyzed';
+COMMENT ON COLUMN attention_frames.ear IS 'Eye Aspect Ratio for the frame';
+COMMENT ON COLUMN attention_frames.tilt IS 'Head tilt in degrees for the frame';
+COMMENT ON COLUMN attention_frames.attentive IS 'Whether the child was attentive in the frame';
+COMMENT ON COLUMN attention_frames.quality IS 'Camera quality score for the frame';
+
+-- ============================================
+-- SUCCESS MESSAGE
+-- ============================================
+SELECT 'Attention Frames table created successfully! 🎯' as status;